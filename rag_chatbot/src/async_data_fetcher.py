@@ -0,0 +1,242 @@
+"""
+Asynchronous financial data fetching for concurrent multi-endpoint lookups
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import aiohttp
+import orjson
+
+from rag_chatbot.src.config import Config
+from rag_chatbot.src.data_fetcher import FinancialDataFetcher, _RateLimiter
+
+
+class AsyncFinancialDataFetcher:
+    """Fetch quotes from several free APIs concurrently with a shared aiohttp session"""
+
+    def __init__(self, max_connections: int = 20, timeout: int = 10):
+        # yfinance is blocking; its calls run in worker threads via the sync fetcher
+        self.sync_fetcher = FinancialDataFetcher()
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # API endpoints
+        self.finnhub_base = self.sync_fetcher.finnhub_base
+        self.fmp_base = self.sync_fetcher.fmp_base
+        self.coingecko_base = self.sync_fetcher.coingecko_base
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily create the shared session (must be called inside a running loop)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.timeout,
+                # aiohttp negotiates Accept-Encoding for the decoders it has
+                headers={
+                    name: value for name, value in self.sync_fetcher.session.headers.items()
+                    if name.lower() != 'accept-encoding'
+                }
+            )
+        return self._session
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_json(self, url: str, params: Dict, limiter: Optional[_RateLimiter] = None):
+        """
+        Issue a GET request through the rate limiter and decode the JSON body
+
+        429 responses are retried like FinancialDataFetcher._get_with_backoff,
+        but waits are asyncio sleeps so a cancelled request stops at once.
+        """
+        retries = FinancialDataFetcher.MAX_RATE_LIMIT_RETRIES
+        for attempt in range(retries + 1):
+            while limiter is not None:
+                delay = limiter.try_acquire()
+                if not delay:
+                    break
+                await asyncio.sleep(delay)
+
+            async with self._get_session().get(url, params=params) as response:
+                if response.status != 429 or attempt == retries:
+                    response.raise_for_status()
+                    return await response.json(loads=orjson.loads, content_type=None)
+                delay = FinancialDataFetcher._retry_delay(response.headers, attempt)
+
+            await asyncio.sleep(delay)
+
+    # ==================== PER-PROVIDER QUOTES ====================
+
+    async def get_stock_quote(self, ticker: str) -> Dict:
+        """
+        Get current stock price and metrics using yfinance in a worker thread
+
+        Args:
+            ticker: Stock symbol (e.g., 'AAPL', 'MSFT')
+
+        Returns:
+            Dictionary with current stock information
+        """
+        return await asyncio.to_thread(self.sync_fetcher.get_stock_quote, ticker)
+
+    async def get_finnhub_quote(self, ticker: str) -> Dict:
+        """
+        Get real-time quote from Finnhub
+        """
+        if not Config.finnhub_api_key():
+            return {"error": "Finnhub API key not configured"}
+
+        try:
+            url = f"{self.finnhub_base}/quote"
+            params = {
+                'symbol': ticker.upper(),
+                'token': Config.finnhub_api_key()
+            }
+
+            data = await self._get_json(url, params, self.sync_fetcher.finnhub_limiter)
+            return FinancialDataFetcher._format_finnhub_quote(ticker, data)
+        except Exception as e:
+            return {"error": f"Finnhub API error: {str(e)}"}
+
+    async def get_fmp_quote(self, ticker: str) -> Dict:
+        """
+        Get quote from Financial Modeling Prep
+        """
+        if not Config.fmp_api_key():
+            return {"error": "FMP API key not configured"}
+
+        # The counter is a blocking flock/file write or Redis round trip
+        if not await asyncio.to_thread(self.sync_fetcher._consume_daily_budget, "fmp", Config.FMP_CALLS_PER_DAY):
+            return {"error": "FMP daily request budget exhausted"}
+
+        try:
+            url = f"{self.fmp_base}/quote/{ticker.upper()}"
+            params = {'apikey': Config.fmp_api_key()}
+
+            data = await self._get_json(url, params)
+            return FinancialDataFetcher._format_fmp_quote(ticker, data)
+        except Exception as e:
+            return {"error": f"FMP API error: {str(e)}"}
+
+    async def get_crypto_price(self, crypto_id: str = "bitcoin") -> Dict:
+        """
+        Get cryptocurrency data from CoinGecko
+
+        Args:
+            crypto_id: Coin ID (bitcoin, ethereum, cardano, etc.)
+
+        Returns:
+            Dictionary with crypto data
+        """
+        try:
+            url = f"{self.coingecko_base}/simple/price"
+            params = FinancialDataFetcher._coingecko_params(crypto_id)
+
+            data = await self._get_json(url, params)
+            return FinancialDataFetcher._format_crypto_price(crypto_id, data)
+        except Exception as e:
+            return {"error": f"CoinGecko API error: {str(e)}"}
+
+    # ==================== AGGREGATED DATA METHODS ====================
+
+    async def get_comprehensive_quote(self, ticker: str) -> Dict:
+        """
+        Get a quote from Yahoo Finance, racing the keyed providers only if it is slow
+
+        Finnhub and FMP are started only when Yahoo fails or exceeds
+        Config.PREFERRED_QUOTE_WAIT, so their free quotas are not spent on
+        every quote.
+
+        Args:
+            ticker: Stock symbol
+
+        Returns:
+            First successful quote in priority order (Yahoo, Finnhub, FMP)
+        """
+        # Not the default executor: asyncio.run() joins that on exit, so the
+        # sync wrapper would still block on an abandoned yfinance call
+        executor = ThreadPoolExecutor(max_workers=1)
+        yahoo = asyncio.get_running_loop().run_in_executor(
+            executor, self.sync_fetcher.get_stock_quote, ticker
+        )
+        tasks = [yahoo]
+        try:
+            done, _ = await asyncio.wait({yahoo}, timeout=Config.PREFERRED_QUOTE_WAIT)
+            if yahoo in done and not yahoo.exception() and "error" not in yahoo.result():
+                return yahoo.result()
+
+            if Config.finnhub_api_key():
+                tasks.append(asyncio.ensure_future(self.get_finnhub_quote(ticker)))
+            if Config.fmp_api_key():
+                tasks.append(asyncio.ensure_future(self.get_fmp_quote(ticker)))
+
+            pending = set(tasks)
+            while pending:
+                # Check finished providers in priority order
+                for task in tasks:
+                    if task in pending and task.done():
+                        pending.discard(task)
+                        if not task.exception() and "error" not in task.result():
+                            return task.result()
+
+                if pending:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False)
+
+        return {"error": f"Unable to fetch quote for {ticker} from any source"}
+
+    async def get_market_overview(self) -> Dict:
+        """
+        Get overview of major market indices, fetched concurrently
+        """
+        indices = FinancialDataFetcher.MARKET_INDICES
+        quotes = await asyncio.gather(
+            *(self.get_stock_quote(symbol) for symbol in indices.values()),
+            return_exceptions=True
+        )
+
+        overview = {}
+        for name, quote in zip(indices, quotes):
+            if isinstance(quote, dict) and "error" not in quote:
+                overview[name] = {
+                    "price": quote.get('current_price'),
+                    "change": quote.get('change'),
+                    "change_percent": quote.get('percent_change')
+                }
+
+        return overview
+
+    # ==================== SYNC WRAPPERS ====================
+
+    def _run_sync(self, coro_func, *args):
+        """Run a coroutine method to completion from synchronous code"""
+        async def runner():
+            try:
+                return await coro_func(*args)
+            finally:
+                # The session is bound to this loop, which asyncio.run discards
+                await self.close()
+
+        return asyncio.run(runner())
+
+    def get_comprehensive_quote_sync(self, ticker: str) -> Dict:
+        """Blocking wrapper around get_comprehensive_quote"""
+        return self._run_sync(self.get_comprehensive_quote, ticker)
+
+    def get_market_overview_sync(self) -> Dict:
+        """Blocking wrapper around get_market_overview"""
+        return self._run_sync(self.get_market_overview)
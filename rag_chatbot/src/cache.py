@@ -0,0 +1,430 @@
+"""
+TTL caches (local disk or shared Redis) for external API responses
+"""
+import functools
+import hashlib
+import io
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import pandas as pd
+
+from rag_chatbot.src.config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: counters are only locked within the process
+    fcntl = None
+
+
+class CachePolicy(NamedTuple):
+    """TTL bounds (seconds) for responses whose freshness scales with generation time"""
+    min_ttl: int
+    max_ttl: int
+
+    def ttl_for(self, gen_time: float, buffer: float) -> int:
+        return int(max(self.min_ttl, min(self.max_ttl, gen_time * buffer)))
+
+
+SHORT = CachePolicy(1 * 60, 10 * 60)
+NORMAL = CachePolicy(10 * 60, 30 * 60)
+LONG = CachePolicy(30 * 60, 60 * 60)
+
+
+def make_key(*parts) -> str:
+    """Build a stable md5 cache key from arbitrary (repr-able) parts"""
+    return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+
+def is_error_result(result: Any) -> bool:
+    """Whether a fetcher result signals an upstream failure (and must not be cached)"""
+    if result is None:
+        return True
+    if isinstance(result, dict) and "error" in result:
+        return True
+    if hasattr(result, 'empty'):  # pandas objects
+        return bool(result.empty)
+    if isinstance(result, (list, dict)):
+        return not result
+    return False
+
+
+class FileCache:
+    """
+    Persist values under {cache_dir}/{endpoint}/{key}.json (or .pkl) with an embedded expiry
+
+    Entries past expiry plus `max_stale` are pruned periodically, and each endpoint
+    keeps at most `max_entries` files, evicting the least recently used.
+    """
+
+    SUFFIXES = ('.json', '.pkl')
+
+    def __init__(self, cache_dir: str = None, max_stale: int = None, max_entries: int = None):
+        """
+        Args:
+            cache_dir: Cache root (defaults to Config.CACHE_DIR)
+            max_stale: Seconds past expiry an entry may still be served as stale
+            max_entries: Maximum number of entries kept per endpoint
+        """
+        self.cache_dir = Path(cache_dir or Config.CACHE_DIR)
+        self.max_stale = Config.CACHE_MAX_STALE if max_stale is None else max_stale
+        self.max_entries = Config.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._last_prune = {}
+        self._prune_lock = threading.Lock()
+        self._incr_lock = threading.Lock()
+
+    def _path(self, endpoint: str, key: str, suffix: str) -> Path:
+        return self.cache_dir / endpoint / f"{key}{suffix}"
+
+    @staticmethod
+    def _read_entry(path: Path) -> Dict:
+        if path.suffix == '.json':
+            with open(path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+
+    def get(self, endpoint: str, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Args:
+            endpoint: Cache namespace (e.g. 'finnhub_quote')
+            key: Cache key within the namespace
+            allow_stale: Return the value up to `max_stale` seconds after it expired
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        for suffix in self.SUFFIXES:
+            path = self._path(endpoint, key, suffix)
+            if not path.exists():
+                continue
+
+            try:
+                entry = self._read_entry(path)
+            except Exception as e:
+                print(f"Error reading cache entry {path}: {e}")
+                return None
+
+            expires_at = entry.get('expires_at', 0)
+            if allow_stale:
+                expires_at += self.max_stale
+            if time.time() >= expires_at:
+                return None
+
+            try:
+                os.utime(path)  # mtime doubles as the LRU timestamp
+            except OSError:
+                pass
+            return entry.get('value')
+
+        return None
+
+    def _write_entry(self, endpoint: str, key: str, entry: Dict):
+        """Atomically write an entry (unique temp file, then rename)"""
+        directory = self.cache_dir / endpoint
+        os.makedirs(directory, exist_ok=True)
+
+        try:
+            data, suffix, stale_suffix = json.dumps(entry).encode('utf-8'), '.json', '.pkl'
+        except (TypeError, ValueError):
+            data, suffix, stale_suffix = pickle.dumps(entry), '.pkl', '.json'
+
+        path = self._path(endpoint, key, suffix)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+            tmp_path = None
+
+            stale_path = self._path(endpoint, key, stale_suffix)
+            if stale_path.exists():
+                stale_path.unlink()
+        except Exception as e:
+            print(f"Error writing cache entry {path}: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def set(self, endpoint: str, key: str, value: Any, ttl: int, gen_time: Optional[float] = None):
+        """
+        Store a value for `ttl` seconds (`gen_time` is accepted for RedisCache parity)
+
+        JSON is used when the value is serializable; otherwise (e.g. DataFrames)
+        the entry is pickled.
+        """
+        now = time.time()
+        self._write_entry(endpoint, key, {"timestamp": now, "expires_at": now + ttl, "value": value})
+        self._maybe_prune(endpoint)
+
+    def incr(self, endpoint: str, key: str, ttl: int) -> int:
+        """
+        Atomically increment a counter, starting a fresh `ttl`-second window when
+        it is missing or expired (locked across threads and, where supported, processes)
+
+        Returns:
+            The counter value after incrementing
+        """
+        directory = self.cache_dir / endpoint
+        os.makedirs(directory, exist_ok=True)
+
+        with self._incr_lock, open(directory / f"{key}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            now = time.time()
+            entry = None
+            path = self._path(endpoint, key, '.json')
+            if path.exists():
+                try:
+                    entry = self._read_entry(path)
+                except Exception as e:
+                    print(f"Error reading cache counter {path}: {e}")
+
+            if not entry or now >= entry.get('expires_at', 0):
+                entry = {"timestamp": now, "expires_at": now + ttl, "value": 0}
+            entry["value"] += 1
+
+            self._write_entry(endpoint, key, entry)
+            count = entry["value"]
+
+        self._maybe_prune(endpoint)
+        return count
+
+    def _maybe_prune(self, endpoint: str):
+        """Prune an endpoint at most once per Config.CACHE_PRUNE_INTERVAL"""
+        with self._prune_lock:
+            now = time.monotonic()
+            last = self._last_prune.get(endpoint)
+            if last is not None and now - last < Config.CACHE_PRUNE_INTERVAL:
+                return
+            self._last_prune[endpoint] = now
+        self.prune(endpoint)
+
+    def prune(self, endpoint: str):
+        """
+        Delete entries past expiry + max_stale, then evict LRU entries over max_entries
+
+        Counter lock files (see incr) are removed once their entry is gone and
+        they are older than max_stale, so no incr can still be holding them.
+        """
+        directory = self.cache_dir / endpoint
+        if not directory.is_dir():
+            return
+
+        now = time.time()
+        live = []
+        for path in directory.iterdir():
+            if path.suffix not in self.SUFFIXES:
+                continue
+            try:
+                entry = self._read_entry(path)
+                if now >= entry.get('expires_at', 0) + self.max_stale:
+                    path.unlink()
+                else:
+                    live.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+            except Exception:
+                # Unreadable entries are useless; drop them
+                path.unlink(missing_ok=True)
+
+        if len(live) > self.max_entries:
+            live.sort()
+            for _, path in live[:len(live) - self.max_entries]:
+                path.unlink(missing_ok=True)
+            live = live[len(live) - self.max_entries:]
+
+        keys = {path.stem for _, path in live}
+        for path in directory.glob('*.lock'):
+            try:
+                if path.stem not in keys and now - path.stat().st_mtime >= self.max_stale:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+
+
+class RedisCache:
+    """
+    Shared cache for multi-process deployments, stored as Redis hashes
+    rag:{endpoint}:{key} -> {timestamp, expires_at, format, body}
+
+    Eviction is left to the server; run it with `maxmemory-policy allkeys-lfu`.
+
+    Bodies are always JSON (DataFrames are embedded in pandas' "split" layout).
+    Nothing is unpickled, since that would let anyone with write access to a
+    shared Redis run code in the app.
+    """
+
+    DATAFRAME_TAG = "__dataframe__"
+
+    # Endpoints whose TTL is derived from how long the upstream call took; the
+    # result is capped at the endpoint's configured TTL so Redis never serves
+    # staler data than FileCache would
+    DEFAULT_POLICIES = {
+        "stock_quote": SHORT,
+        "finnhub_quote": SHORT,
+        "fmp_quote": SHORT,
+        "crypto_price": SHORT,
+        "company_news": NORMAL,
+    }
+
+    def __init__(self, url: str = None, policies: Dict[str, CachePolicy] = None,
+                 buffer: float = 60, stale_ttl: int = 24 * 60 * 60):
+        """
+        Args:
+            url: Redis connection URL (defaults to Config.redis_url())
+            policies: Per-endpoint TTL policies (defaults to DEFAULT_POLICIES)
+            buffer: Multiplier applied to generation time before clamping to the policy
+            stale_ttl: Extra seconds an expired entry is kept for cache_fallback
+        """
+        import redis
+
+        self.client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(url or Config.redis_url()))
+        self.policies = self.DEFAULT_POLICIES if policies is None else policies
+        self.buffer = buffer
+        self.stale_ttl = stale_ttl
+
+    @staticmethod
+    def _redis_key(endpoint: str, key: str) -> str:
+        return f"rag:{endpoint}:{key}"
+
+    @classmethod
+    def _encode(cls, obj: Any) -> Dict:
+        if isinstance(obj, pd.DataFrame):
+            return {cls.DATAFRAME_TAG: obj.to_json(orient='split', date_format='iso')}
+        raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+    @classmethod
+    def _decode(cls, obj: Dict) -> Any:
+        if set(obj) == {cls.DATAFRAME_TAG}:
+            return pd.read_json(io.StringIO(obj[cls.DATAFRAME_TAG]), orient='split', dtype=False)
+        return obj
+
+    def get(self, endpoint: str, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """Look up a cached value; returns None on a miss"""
+        try:
+            entry = self.client.hgetall(self._redis_key(endpoint, key))
+        except Exception as e:
+            print(f"Error reading cache entry {endpoint}/{key}: {e}")
+            return None
+
+        if not entry:
+            return None
+
+        try:
+            if not allow_stale and time.time() >= float(entry[b'expires_at']):
+                return None
+            if entry.get(b'format') != b'json':
+                return None  # e.g. pickled bodies written by older versions
+            return json.loads(entry[b'body'], object_hook=self._decode)
+        except Exception as e:
+            print(f"Error decoding cache entry {endpoint}/{key}: {e}")
+            return None
+
+    def set(self, endpoint: str, key: str, value: Any, ttl: int, gen_time: Optional[float] = None):
+        """
+        Store a value; if the endpoint has a policy and `gen_time` is known, the TTL is
+        min(ttl, max(policy.min, min(policy.max, gen_time * buffer)))
+        """
+        policy = self.policies.get(endpoint)
+        if policy is not None and gen_time is not None:
+            ttl = min(ttl, policy.ttl_for(gen_time, self.buffer))
+
+        try:
+            body = json.dumps(value, default=self._encode)
+        except (TypeError, ValueError) as e:
+            print(f"Skipping cache entry {endpoint}/{key}: {e}")
+            return
+
+        now = time.time()
+        redis_key = self._redis_key(endpoint, key)
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(redis_key)
+            pipe.hset(redis_key, mapping={
+                "timestamp": now,
+                "expires_at": now + ttl,
+                "format": "json",
+                "body": body,
+            })
+            pipe.expire(redis_key, int(ttl + self.stale_ttl))
+            pipe.execute()
+        except Exception as e:
+            print(f"Error writing cache entry {endpoint}/{key}: {e}")
+
+    def incr(self, endpoint: str, key: str, ttl: int) -> int:
+        """
+        Atomically increment a counter whose window expires `ttl` seconds after
+        its first increment
+
+        Returns:
+            The counter value after incrementing (0 if Redis is unreachable)
+        """
+        redis_key = self._redis_key(endpoint, key)
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(redis_key, 0, ex=int(ttl), nx=True)
+            pipe.incr(redis_key)
+            _, count = pipe.execute()
+            return int(count)
+        except Exception as e:
+            print(f"Error incrementing cache counter {endpoint}/{key}: {e}")
+            return 0
+
+
+def get_default_cache():
+    """RedisCache when REDIS_URL is configured, otherwise a local FileCache"""
+    if Config.redis_url():
+        try:
+            return RedisCache()
+        except Exception as e:
+            print(f"Redis cache unavailable, falling back to file cache: {e}")
+    return FileCache()
+
+
+def cached(endpoint: str, ttl: int) -> Callable:
+    """
+    Cache a fetcher method's result in `self.cache` for `ttl` seconds
+
+    Keys are md5 hashes of (method name, args, kwargs). Error results are never
+    stored; when `self.cache_fallback` is set, a stale entry is served instead.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return func(self, *args, **kwargs)
+
+            key = make_key(func.__name__, args, sorted(kwargs.items()))
+            hit = cache.get(endpoint, key)
+            if hit is not None:
+                return hit
+
+            started = time.monotonic()
+            result = func(self, *args, **kwargs)
+            gen_time = time.monotonic() - started
+
+            if is_error_result(result):
+                if getattr(self, 'cache_fallback', False):
+                    stale = cache.get(endpoint, key, allow_stale=True)
+                    if stale is not None:
+                        return stale
+                return result
+
+            cache.set(endpoint, key, result, ttl, gen_time=gen_time)
+            return result
+
+        return wrapper
+
+    return decorator
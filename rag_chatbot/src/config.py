@@ -1,14 +1,33 @@
 import os
+import functools
 from dotenv import load_dotenv
 
+load_dotenv()
+
+
+def _env(name: str, default: str = None):
+    """Memoized environment lookup, resolved on first use rather than at import"""
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def getter(cls):
+        return os.getenv(name, default)
+    return getter
+
+
 class Config:
-    OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
-    PINECONE_API_KEY=os.getenv("PINECONE_KEY")
-    FINHUB_API_KEY=os.getenv("FINHUB_API_KEY")
-    FMP_API_KEY=os.getenv("FMP_API_KEY")
+    openai_api_key = _env("OPENAI_API_KEY")
+    pinecone_api_key = _env("PINECONE_KEY")
+    fmp_api_key = _env("FMP_API_KEY")
+    
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def finnhub_api_key(cls):
+        # FINHUB_API_KEY is the historical (misspelled) variable name
+        return os.getenv("FINNHUB_API_KEY") or os.getenv("FINHUB_API_KEY")
     
-    PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT", "gcp-starter")
-    PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "financial-docs")
+    pinecone_environment = _env("PINECONE_ENVIRONMENT", "gcp-starter")
+    pinecone_index_name = _env("PINECONE_INDEX_NAME", "financial-docs")
+    redis_url = _env("REDIS_URL")  # shared API cache across workers when set
 
     EMBEDDING_MODEL = "text-embedding-3-small"
     EMBEDDING_DIMENSION = 1536
@@ -21,16 +40,42 @@ class Config:
     
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
+    TEXT_SPLITTER = "character"  # "character" (len) or "tiktoken" (cl100k_base token counts)
+    TIKTOKEN_ENCODING = "cl100k_base"
     
     DATA_DIR = "data/documents"
     PROCESSED_DIR = "data/processed"
     
+    # API response cache (TTLs in seconds)
+    CACHE_DIR = ".cache"
+    CACHE_FALLBACK = True
+    CACHE_MAX_STALE = 24 * 60 * 60  # oldest expired entry cache_fallback may serve
+    CACHE_MAX_ENTRIES = 1000  # per endpoint; least recently used files are evicted
+    CACHE_PRUNE_INTERVAL = 10 * 60
+    QUOTE_CACHE_TTL = 60
+    NEWS_CACHE_TTL = 60 * 60
+    COMPANY_INFO_CACHE_TTL = 30 * 24 * 60 * 60
+    FINANCIALS_CACHE_TTL = 90 * 24 * 60 * 60
+    TICKER_MEMO_TTL = 30  # in-process yfinance Ticker/.info reuse
+    PREFERRED_QUOTE_WAIT = 2  # seconds Yahoo Finance gets before a faster provider wins
+    
+    # Free-tier API limits
+    FINNHUB_CALLS_PER_MINUTE = 60
+    FMP_CALLS_PER_DAY = 250
+    
+    @classmethod
+    def reload(cls):
+        """Drop memoized environment values so they are re-read on next access"""
+        for name in ("openai_api_key", "pinecone_api_key", "fmp_api_key", "finnhub_api_key",
+                     "pinecone_environment", "pinecone_index_name", "redis_url"):
+            getattr(cls, name).__func__.cache_clear()
+    
     @classmethod
     def validate(cls):
         """Validate that required API keys are present"""
         required = {
-            "OPENAI_API_KEY": cls.OPENAI_API_KEY,
-            "PINECONE_API_KEY": cls.PINECONE_API_KEY,
+            "OPENAI_API_KEY": cls.openai_api_key(),
+            "PINECONE_API_KEY": cls.pinecone_api_key(),
         }
         
         missing = [key for key, value in required.items() if not value]
@@ -39,4 +84,7 @@ class Config:
             raise ValueError(f"Missing required API keys: {', '.join(missing)}")
         
         return True
-Config.validate
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    Config.validate()
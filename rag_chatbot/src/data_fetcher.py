@@ -1,29 +1,178 @@
 """
 Enhanced financial data fetching from multiple open-source APIs
 """
+import functools
+import threading
+import orjson
 import yfinance as yf
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
 import pandas as pd
-# from rag_chatbot.src.config import Config
+from rag_chatbot.src.config import Config
+from rag_chatbot.src.cache import FileCache, RedisCache, cached, get_default_cache
 import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+
+class _RateLimiter:
+    """Sliding-window limiter allowing at most `rate` calls per `per` seconds"""
+    
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self._calls = deque()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self) -> float:
+        """Take a slot if one is free; otherwise return the seconds until one frees up"""
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.per:
+                self._calls.popleft()
+            
+            if len(self._calls) < self.rate:
+                self._calls.append(now)
+                return 0.0
+            
+            return self.per - (now - self._calls[0])
+    
+    def acquire(self):
+        """Block only as long as needed to stay within the window"""
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return
+            time.sleep(delay)
 
 
 class FinancialDataFetcher:
     """Fetch real-time and historical financial data from free APIs"""
     
-    def __init__(self):
+    MARKET_INDICES = {
+        "S&P 500": "^GSPC",
+        "Dow Jones": "^DJI",
+        "NASDAQ": "^IXIC",
+        "Russell 2000": "^RUT"
+    }
+    
+    def __init__(self, cache: Optional[Union[FileCache, RedisCache]] = None,
+                 cache_fallback: bool = Config.CACHE_FALLBACK):
+        """
+        Args:
+            cache: Response cache (defaults to RedisCache if REDIS_URL is set, else FileCache)
+            cache_fallback: Serve stale cached data when an upstream call fails
+        """
+        self.cache = cache if cache is not None else get_default_cache()
+        self.cache_fallback = cache_fallback
+        
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Connection': 'keep-alive',
+            # gzip/deflate, plus br/zstd when the matching decoder is installed
+            'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding']
         })
         
+        # Pooled keep-alive connections with retries on transient failures
+        # (429s are handled by _get_with_backoff so Retry-After is honoured once)
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=['GET']
+            )
+        )
+        self.session.mount('https://', adapter)
+        
+        self.finnhub_limiter = _RateLimiter(Config.FINNHUB_CALLS_PER_MINUTE, 60)
+        
         # API endpoints
         self.finnhub_base = "https://finnhub.io/api/v1"
         self.fmp_base = "https://financialmodelingprep.com/api/v3"
         self.coingecko_base = "https://api.coingecko.com/api/v3"
+        self.yahoo_spark_url = "https://query1.finance.yahoo.com/v8/finance/spark"
+    
+    # ==================== RATE LIMITING ====================
+    
+    MAX_RATE_LIMIT_RETRIES = 3
+    
+    def _get_with_backoff(self, url: str, params: Dict, limiter: Optional[_RateLimiter] = None) -> requests.Response:
+        """
+        GET through the rate limiter, retrying 429 responses
+        
+        Waits for the server's Retry-After when given, otherwise backs off
+        exponentially (capped at 30s).
+        """
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            if limiter is not None:
+                limiter.acquire()
+            
+            response = self.session.get(url, params=params, timeout=10)
+            if response.status_code != 429 or attempt == self.MAX_RATE_LIMIT_RETRIES:
+                return response
+            
+            time.sleep(self._retry_delay(response.headers, attempt))
+        
+        return response
+    
+    @staticmethod
+    def _retry_delay(headers, attempt: int) -> float:
+        """Seconds to wait before retrying a 429 (Retry-After if numeric, capped at 30s)"""
+        delay = min(2 ** attempt, 30)
+        try:
+            delay = min(float(headers.get('Retry-After', delay)), 30)
+        except ValueError:
+            pass  # HTTP-date form; keep the exponential delay
+        return max(delay, 0)
+    
+    def _consume_daily_budget(self, name: str, limit: int) -> bool:
+        """
+        Count one call against a per-day quota kept in the cache layer
+        (shared across workers when the cache is Redis)
+        
+        Returns:
+            False if today's budget is already used up
+        """
+        if self.cache is None:
+            return True
+        
+        key = f"{name}_{date.today().isoformat()}"
+        return self.cache.incr("rate_limit", key, ttl=24 * 60 * 60) <= limit
+    
+    # ==================== YFINANCE MEMOIZATION ====================
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _ticker_for_bucket(ticker: str, bucket: int) -> yf.Ticker:
+        return yf.Ticker(ticker)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _info_for_bucket(ticker: str, bucket: int) -> Dict:
+        return FinancialDataFetcher._ticker_for_bucket(ticker, bucket).info
     
+    @staticmethod
+    def _memo_bucket() -> int:
+        """Time bucket that expires memoized yfinance objects every TICKER_MEMO_TTL seconds"""
+        return int(time.monotonic() // Config.TICKER_MEMO_TTL)
+    
+    def _get_ticker(self, ticker: str) -> yf.Ticker:
+        """Shared yf.Ticker per symbol, reused for TICKER_MEMO_TTL seconds"""
+        return self._ticker_for_bucket(ticker.upper(), self._memo_bucket())
+    
+    def _get_info(self, ticker: str) -> Dict:
+        """Memoized yf.Ticker(ticker).info so one request fetches it only once"""
+        return self._info_for_bucket(ticker.upper(), self._memo_bucket())
+    
+    @cached(endpoint="stock_quote", ttl=Config.QUOTE_CACHE_TTL)
     def get_stock_quote(self, ticker: str) -> Dict:
         """
         Get current stock price and metrics using yfinance (FREE, no key needed)
@@ -35,12 +184,13 @@ class FinancialDataFetcher:
             Dictionary with current stock information
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self._get_info(ticker)
             
-            # Get current trading data
-            current_data = stock.history(period='1d', interval='1m')
-            current_price = current_data['Close'].iloc[-1] if not current_data.empty else info.get('currentPrice')
+            # .info already carries the live price; only download bars if it doesn't
+            current_price = info.get('currentPrice') or info.get('regularMarketPrice') or info.get('previousClose')
+            if current_price is None:
+                current_data = self._get_ticker(ticker).history(period='1d', interval='1m')
+                current_price = current_data['Close'].iloc[-1] if not current_data.empty else None
             
             return {
                 "ticker": ticker.upper(),
@@ -87,6 +237,65 @@ class FinancialDataFetcher:
             print(f"Error fetching historical data: {e}")
             return pd.DataFrame()
     
+    def get_historical_data_batch(self, tickers: List[str], period: str = "1mo",
+                                  interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """
+        Get historical data for several tickers with one threaded yf.download call
+        
+        Like get_historical_data, frames hold adjusted prices (auto_adjust=True),
+        Dividends/Stock Splits columns (actions=True) and a tz-aware index
+        (ignore_tz=False). yf.download converts every index to the batch's most
+        common exchange timezone, so tickers from other exchanges are not in
+        their local time as they would be with get_historical_data.
+        
+        The result keeps the order of `tickers`; each frame is sorted by date and
+        only holds rows where that ticker has data (yf.download aligns every
+        ticker on a shared, NaN-padded index).
+        
+        Args:
+            tickers: List of stock symbols
+            period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
+            interval: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
+        
+        Returns:
+            Dictionary mapping each ticker to its historical DataFrame
+        """
+        if not tickers:
+            return {}
+        
+        try:
+            data = yf.download(
+                " ".join(tickers),
+                period=period,
+                interval=interval,
+                group_by='ticker',
+                auto_adjust=True,
+                actions=True,
+                ignore_tz=False,
+                threads=True,
+                progress=False
+            )
+        except Exception as e:
+            print(f"Error fetching historical data: {e}")
+            return {ticker: pd.DataFrame() for ticker in tickers}
+        
+        history = {}
+        for ticker in tickers:
+            symbol = ticker.upper()
+            if isinstance(data.columns, pd.MultiIndex):
+                hist = data[symbol].copy() if symbol in data.columns.get_level_values(0) else pd.DataFrame()
+            else:
+                # Older yfinance versions return flat columns for a single ticker
+                hist = data.copy() if len(tickers) == 1 else pd.DataFrame()
+            
+            hist = hist.dropna(how='all').sort_index()
+            if not hist.empty:
+                hist['ticker'] = symbol
+            history[ticker] = hist
+        
+        return history
+    
+    @cached(endpoint="company_info", ttl=Config.COMPANY_INFO_CACHE_TTL)
     def get_company_info(self, ticker: str) -> Dict:
         """
         Get detailed company information (FREE)
@@ -98,8 +307,7 @@ class FinancialDataFetcher:
             Dictionary with company details
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self._get_info(ticker)
             
             return {
                 "ticker": ticker.upper(),
@@ -118,6 +326,7 @@ class FinancialDataFetcher:
         except Exception as e:
             return {"error": f"Failed to fetch company info: {str(e)}"}
     
+    @cached(endpoint="financial_statements", ttl=Config.FINANCIALS_CACHE_TTL)
     def get_financial_statements(self, ticker: str) -> Dict:
         """
         Get income statement, balance sheet, and cash flow (FREE)
@@ -129,78 +338,250 @@ class FinancialDataFetcher:
             Dictionary with financial statements as DataFrames
         """
         try:
-            stock = yf.Ticker(ticker)
+            stock = self._get_ticker(ticker)
             
-            return {
-                "income_statement": stock.financials,
-                "balance_sheet": stock.balance_sheet,
-                "cash_flow": stock.cashflow,
-                "quarterly_financials": stock.quarterly_financials,
-                "quarterly_balance_sheet": stock.quarterly_balance_sheet,
-                "quarterly_cashflow": stock.quarterly_cashflow,
-                "source": "Yahoo Finance"
-            }
+            return self._statements_from_ticker(stock)
         except Exception as e:
             return {"error": f"Failed to fetch financial statements: {str(e)}"}
     
+    @staticmethod
+    def _statements_from_ticker(stock: yf.Ticker) -> Dict:
+        """Collect the financial statement DataFrames of a yfinance Ticker"""
+        return {
+            "income_statement": stock.financials,
+            "balance_sheet": stock.balance_sheet,
+            "cash_flow": stock.cashflow,
+            "quarterly_financials": stock.quarterly_financials,
+            "quarterly_balance_sheet": stock.quarterly_balance_sheet,
+            "quarterly_cashflow": stock.quarterly_cashflow,
+            "source": "Yahoo Finance"
+        }
+    
+    # ==================== BATCH (multi-ticker) METHODS ====================
+    
+    def get_quotes_batch(self, tickers: List[str], max_workers: int = 8) -> Dict[str, Dict]:
+        """
+        Get quotes for several tickers concurrently (yfinance calls are I/O-bound)
+        
+        Args:
+            tickers: List of stock symbols
+            max_workers: Maximum number of worker threads
+        
+        Returns:
+            Dictionary mapping each ticker to its quote (or error) dictionary
+        """
+        if not tickers:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+            quotes = executor.map(self.get_stock_quote, tickers)
+            return dict(zip(tickers, quotes))
+    
+    QUOTE_INT_COLUMNS = ["volume", "avg_volume", "market_cap"]
+    QUOTE_FLOAT_COLUMNS = [
+        "current_price", "previous_close", "open", "day_high", "day_low",
+        "pe_ratio", "forward_pe", "dividend_yield", "beta",
+        "52_week_high", "52_week_low", "50_day_avg", "200_day_avg"
+    ]
+    
+    def get_quotes_df(self, tickers: List[str], max_workers: int = 8) -> pd.DataFrame:
+        """
+        Get quotes for several tickers as one column-oriented DataFrame
+        
+        Args:
+            tickers: List of stock symbols
+            max_workers: Maximum number of worker threads
+        
+        Returns:
+            DataFrame indexed by ticker with downcast float columns and nullable
+            Int64 volume/market cap columns; tickers that failed are omitted
+        """
+        quotes = self.get_quotes_batch(tickers, max_workers=max_workers)
+        records = [quote for quote in quotes.values() if "error" not in quote]
+        
+        columns = ["ticker"] + self.QUOTE_FLOAT_COLUMNS + self.QUOTE_INT_COLUMNS + ["timestamp", "source"]
+        df = pd.DataFrame.from_records(records, columns=columns).set_index("ticker")
+        
+        for column in self.QUOTE_FLOAT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce', downcast='float')
+        for column in self.QUOTE_INT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').round().astype("Int64")
+        
+        return df
+    
+    SPARK_MAX_SYMBOLS = 20  # Yahoo spark endpoint limit per request
+    
+    def get_quotes_multi(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Get lightweight quotes for many tickers via Yahoo's spark endpoint
+        (up to 20 symbols per HTTP request instead of one request per ticker)
+        
+        Args:
+            tickers: List of stock symbols
+        
+        Returns:
+            Dictionary mapping each ticker found to its quote dictionary
+        """
+        quotes = {}
+        now_iso = datetime.now().isoformat()
+        for start in range(0, len(tickers), self.SPARK_MAX_SYMBOLS):
+            chunk = tickers[start:start + self.SPARK_MAX_SYMBOLS]
+            params = {
+                'symbols': ','.join(chunk),
+                'range': '1d',
+                'interval': '1m',
+                'indicators': 'close'
+            }
+            
+            try:
+                response = self.session.get(self.yahoo_spark_url, params=params, timeout=10)
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+            except Exception as e:
+                print(f"Error fetching spark quotes for {', '.join(chunk)}: {e}")
+                continue
+            
+            # Newer responses are keyed by symbol; older ones nest under spark.result
+            if "spark" in data:
+                data = {
+                    item.get('symbol'): (item.get('response') or [{}])[0]
+                    for item in data["spark"].get("result") or []
+                }
+            
+            for ticker in chunk:
+                series = data.get(ticker) or data.get(ticker.upper())
+                if series:
+                    quote = self._format_spark_quote(ticker, series, now_iso)
+                    if quote.get('current_price') is not None:
+                        quotes[ticker] = quote
+        
+        return quotes
+    
+    @staticmethod
+    def _format_spark_quote(ticker: str, series: Dict, timestamp: str) -> Dict:
+        """Map one symbol's spark series onto the common quote layout"""
+        meta = series.get('meta', {})
+        if 'close' in series:
+            closes = series.get('close') or []
+        else:
+            closes = (series.get('indicators', {}).get('quote') or [{}])[0].get('close') or []
+        closes = [c for c in closes if c is not None]
+        
+        current_price = closes[-1] if closes else meta.get('regularMarketPrice')
+        previous_close = (
+            series.get('chartPreviousClose') or series.get('previousClose')
+            or meta.get('chartPreviousClose') or meta.get('previousClose')
+        )
+        
+        change = percent_change = None
+        if current_price is not None and previous_close:
+            change = current_price - previous_close
+            percent_change = change / previous_close * 100
+        
+        return {
+            "ticker": ticker.upper(),
+            "current_price": current_price,
+            "previous_close": previous_close,
+            "change": change,
+            "percent_change": percent_change,
+            "timestamp": timestamp,
+            "source": "Yahoo Finance"
+        }
+    
+    def download_financials_batch(self, tickers: List[str], max_workers: int = 8) -> Dict[str, Dict]:
+        """
+        Get financial statements for several tickers concurrently
+        
+        Args:
+            tickers: List of stock symbols
+            max_workers: Maximum number of worker threads
+        
+        Returns:
+            Dictionary mapping each ticker to its financial statements dictionary
+        """
+        if not tickers:
+            return {}
+        
+        try:
+            stocks = yf.Tickers(" ".join(tickers)).tickers
+        except Exception as e:
+            return {ticker: {"error": f"Failed to fetch financial statements: {str(e)}"} for ticker in tickers}
+        
+        def fetch(ticker: str) -> Dict:
+            try:
+                return self._statements_from_ticker(stocks[ticker.upper()])
+            except Exception as e:
+                return {"error": f"Failed to fetch financial statements: {str(e)}"}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as executor:
+            return dict(zip(tickers, executor.map(fetch, tickers)))
+    
     # ==================== FINNHUB (Free tier: 60 calls/min) ====================
     
+    @cached(endpoint="finnhub_quote", ttl=Config.QUOTE_CACHE_TTL)
     def get_finnhub_quote(self, ticker: str) -> Dict:
         """
         Get real-time quote from Finnhub
         Requires free API key from: https://finnhub.io/register
         """
-        if not Config.FINNHUB_API_KEY:
+        if not Config.finnhub_api_key():
             return {"error": "Finnhub API key not configured"}
         
         try:
             url = f"{self.finnhub_base}/quote"
             params = {
                 'symbol': ticker.upper(),
-                'token': Config.FINNHUB_API_KEY
+                'token': Config.finnhub_api_key()
             }
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get_with_backoff(url, params, self.finnhub_limiter)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
-            return {
-                "ticker": ticker.upper(),
-                "current_price": data.get('c'),  # Current price
-                "change": data.get('d'),  # Change
-                "percent_change": data.get('dp'),  # Percent change
-                "high": data.get('h'),  # High price of day
-                "low": data.get('l'),  # Low price of day
-                "open": data.get('o'),  # Open price
-                "previous_close": data.get('pc'),  # Previous close
-                "timestamp": datetime.fromtimestamp(data.get('t', 0)).isoformat(),
-                "source": "Finnhub"
-            }
+            return self._format_finnhub_quote(ticker, data)
         except Exception as e:
             return {"error": f"Finnhub API error: {str(e)}"}
     
+    @staticmethod
+    def _format_finnhub_quote(ticker: str, data: Dict) -> Dict:
+        """Map a raw Finnhub /quote payload onto the common quote layout"""
+        return {
+            "ticker": ticker.upper(),
+            "current_price": data.get('c'),  # Current price
+            "change": data.get('d'),  # Change
+            "percent_change": data.get('dp'),  # Percent change
+            "high": data.get('h'),  # High price of day
+            "low": data.get('l'),  # Low price of day
+            "open": data.get('o'),  # Open price
+            "previous_close": data.get('pc'),  # Previous close
+            "timestamp": datetime.fromtimestamp(data.get('t', 0)).isoformat(),
+            "source": "Finnhub"
+        }
+    
+    @cached(endpoint="company_news", ttl=Config.NEWS_CACHE_TTL)
     def get_company_news(self, ticker: str, days_back: int = 7) -> List[Dict]:
         """
         Get recent company news from Finnhub (FREE)
         """
-        if not Config.FINNHUB_API_KEY:
+        if not Config.finnhub_api_key():
             return []
         
         try:
-            from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
-            to_date = datetime.now().strftime('%Y-%m-%d')
+            now = datetime.now()
+            from_date = (now - timedelta(days=days_back)).strftime('%Y-%m-%d')
+            to_date = now.strftime('%Y-%m-%d')
             
             url = f"{self.finnhub_base}/company-news"
             params = {
                 'symbol': ticker.upper(),
                 'from': from_date,
                 'to': to_date,
-                'token': Config.FINNHUB_API_KEY
+                'token': Config.finnhub_api_key()
             }
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get_with_backoff(url, params, self.finnhub_limiter)
             response.raise_for_status()
-            news = response.json()
+            news = orjson.loads(response.content)
             
             # Format news items
             formatted_news = []
@@ -220,95 +601,151 @@ class FinancialDataFetcher:
     
     # ==================== FINANCIAL MODELING PREP (Free: 250 calls/day) ====================
     
+    @cached(endpoint="fmp_quote", ttl=Config.QUOTE_CACHE_TTL)
     def get_fmp_quote(self, ticker: str) -> Dict:
         """
         Get quote from Financial Modeling Prep
         Free API key from: https://financialmodelingprep.com/developer/docs/
         """
-        if not Config.FMP_API_KEY:
+        if not Config.fmp_api_key():
             return {"error": "FMP API key not configured"}
         
+        if not self._consume_daily_budget("fmp", Config.FMP_CALLS_PER_DAY):
+            return {"error": "FMP daily request budget exhausted"}
+        
         try:
             url = f"{self.fmp_base}/quote/{ticker.upper()}"
-            params = {'apikey': Config.FMP_API_KEY}
+            params = {'apikey': Config.fmp_api_key()}
             
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get_with_backoff(url, params)
             response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                return {"error": "No data returned"}
+            data = orjson.loads(response.content)
             
-            quote = data[0]
-            return {
-                "ticker": ticker.upper(),
-                "current_price": quote.get('price'),
-                "change": quote.get('change'),
-                "percent_change": quote.get('changesPercentage'),
-                "day_high": quote.get('dayHigh'),
-                "day_low": quote.get('dayLow'),
-                "open": quote.get('open'),
-                "previous_close": quote.get('previousClose'),
-                "volume": quote.get('volume'),
-                "avg_volume": quote.get('avgVolume'),
-                "market_cap": quote.get('marketCap'),
-                "pe": quote.get('pe'),
-                "eps": quote.get('eps'),
-                "timestamp": datetime.now().isoformat(),
-                "source": "Financial Modeling Prep"
-            }
+            return self._format_fmp_quote(ticker, data)
         except Exception as e:
             return {"error": f"FMP API error: {str(e)}"}
     
+    @staticmethod
+    def _format_fmp_quote(ticker: str, data: List[Dict]) -> Dict:
+        """Map a raw FMP /quote payload onto the common quote layout"""
+        if not data:
+            return {"error": "No data returned"}
+        
+        quote = data[0]
+        return {
+            "ticker": ticker.upper(),
+            "current_price": quote.get('price'),
+            "change": quote.get('change'),
+            "percent_change": quote.get('changesPercentage'),
+            "day_high": quote.get('dayHigh'),
+            "day_low": quote.get('dayLow'),
+            "open": quote.get('open'),
+            "previous_close": quote.get('previousClose'),
+            "volume": quote.get('volume'),
+            "avg_volume": quote.get('avgVolume'),
+            "market_cap": quote.get('marketCap'),
+            "pe": quote.get('pe'),
+            "eps": quote.get('eps'),
+            "timestamp": datetime.now().isoformat(),
+            "source": "Financial Modeling Prep"
+        }
+    
     # ==================== COINGECKO (Crypto - FREE, no key) ====================
     
-    def get_crypto_price(self, crypto_id: str = "bitcoin") -> Dict:
+    @cached(endpoint="crypto_price", ttl=Config.QUOTE_CACHE_TTL)
+    def get_crypto_prices(self, crypto_ids: Union[List[str], str]) -> Dict[str, Dict]:
         """
-        Get cryptocurrency data from CoinGecko (FREE, no API key)
+        Get data for several cryptocurrencies with a single CoinGecko request
         
         Args:
-            crypto_id: Coin ID (bitcoin, ethereum, cardano, etc.)
+            crypto_ids: Coin IDs (bitcoin, ethereum, cardano, etc.); a single ID
+                        string is treated as a one-element list
         
         Returns:
-            Dictionary with crypto data
+            Dictionary mapping each coin ID found to its crypto data (unknown IDs
+            are omitted), or a top-level "error" entry if the request itself failed
         """
+        if isinstance(crypto_ids, str):
+            crypto_ids = [crypto_ids]
+        
+        # Drop blanks and duplicates while keeping the caller's order
+        ids = list(dict.fromkeys(crypto_id.strip() for crypto_id in crypto_ids or [] if crypto_id and crypto_id.strip()))
+        if not ids:
+            return {"error": "No crypto IDs given"}
+        
         try:
             url = f"{self.coingecko_base}/simple/price"
-            params = {
-                'ids': crypto_id,
-                'vs_currencies': 'usd',
-                'include_market_cap': 'true',
-                'include_24hr_vol': 'true',
-                'include_24hr_change': 'true',
-                'include_last_updated_at': 'true'
-            }
+            params = self._coingecko_params(','.join(ids))
             
             response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            if crypto_id not in data:
-                return {"error": f"Crypto {crypto_id} not found"}
-            
-            coin_data = data[crypto_id]
+            data = orjson.loads(response.content)
             
-            return {
-                "crypto_id": crypto_id,
-                "current_price": coin_data.get('usd'),
-                "market_cap": coin_data.get('usd_market_cap'),
-                "24h_volume": coin_data.get('usd_24h_vol'),
-                "24h_change": coin_data.get('usd_24h_change'),
-                "last_updated": datetime.fromtimestamp(coin_data.get('last_updated_at', 0)).isoformat(),
-                "source": "CoinGecko"
-            }
+            # Per-coin "not found" errors are left out so they are never cached
+            prices = {crypto_id: self._format_crypto_price(crypto_id, data) for crypto_id in ids}
+            return {crypto_id: price for crypto_id, price in prices.items() if "error" not in price}
         except Exception as e:
             return {"error": f"CoinGecko API error: {str(e)}"}
     
+    def get_crypto_price(self, crypto_id: str = "bitcoin") -> Dict:
+        """
+        Get cryptocurrency data from CoinGecko (FREE, no API key)
+        
+        Args:
+            crypto_id: Coin ID (bitcoin, ethereum, cardano, etc.)
+        
+        Returns:
+            Dictionary with crypto data
+        """
+        if not crypto_id or not crypto_id.strip():
+            return {"error": "No crypto ID given"}
+        
+        prices = self.get_crypto_prices([crypto_id])
+        if "error" in prices:
+            return prices
+        
+        return prices.get(crypto_id.strip(), {"error": f"Crypto {crypto_id} not found"})
+    
+    @staticmethod
+    def _coingecko_params(crypto_ids: str) -> Dict:
+        """Query parameters for CoinGecko /simple/price"""
+        return {
+            'ids': crypto_ids,
+            'vs_currencies': 'usd',
+            'include_market_cap': 'true',
+            'include_24hr_vol': 'true',
+            'include_24hr_change': 'true',
+            'include_last_updated_at': 'true'
+        }
+    
+    @staticmethod
+    def _format_crypto_price(crypto_id: str, data: Dict) -> Dict:
+        """Map a raw CoinGecko /simple/price payload onto the crypto layout"""
+        if crypto_id not in data:
+            return {"error": f"Crypto {crypto_id} not found"}
+        
+        coin_data = data[crypto_id]
+        
+        return {
+            "crypto_id": crypto_id,
+            "current_price": coin_data.get('usd'),
+            "market_cap": coin_data.get('usd_market_cap'),
+            "24h_volume": coin_data.get('usd_24h_vol'),
+            "24h_change": coin_data.get('usd_24h_change'),
+            "last_updated": datetime.fromtimestamp(coin_data.get('last_updated_at', 0)).isoformat(),
+            "source": "CoinGecko"
+        }
+    
     # ==================== AGGREGATED DATA METHODS ====================
     
     def get_comprehensive_quote(self, ticker: str) -> Dict:
         """
-        Get quote from multiple sources and merge (fallback strategy)
+        Get a quote from Yahoo Finance, racing the keyed providers only if it is slow
+        
+        Yahoo Finance runs alone for up to Config.PREFERRED_QUOTE_WAIT seconds.
+        Finnhub and FMP (which have tight free quotas) are started only if it
+        fails or exceeds that wait; then the first successful provider wins
+        (ties go to Yahoo, then Finnhub, then FMP) and the rest are abandoned.
         
         Args:
             ticker: Stock symbol
@@ -316,25 +753,65 @@ class FinancialDataFetcher:
         Returns:
             Best available quote data
         """
-        # Try Yahoo Finance first (most reliable, no key needed)
-        yf_quote = self.get_stock_quote(ticker)
-        if "error" not in yf_quote:
-            return yf_quote
+        fallbacks = []
+        if Config.finnhub_api_key():
+            fallbacks.append(self.get_finnhub_quote)
+        if Config.fmp_api_key():
+            fallbacks.append(self.get_fmp_quote)
         
-        # Fallback to Finnhub
-        if Config.FINNHUB_API_KEY:
-            finnhub_quote = self.get_finnhub_quote(ticker)
-            if "error" not in finnhub_quote:
-                return finnhub_quote
+        if not fallbacks:
+            quote = self.get_stock_quote(ticker)
+            return quote if "error" not in quote else {"error": f"Unable to fetch quote for {ticker} from any source"}
         
-        # Fallback to FMP
-        if Config.FMP_API_KEY:
-            fmp_quote = self.get_fmp_quote(ticker)
-            if "error" not in fmp_quote:
-                return fmp_quote
+        # Not used as a context manager: that would block on the losing providers
+        executor = ThreadPoolExecutor(max_workers=1 + len(fallbacks))
+        try:
+            futures = [executor.submit(self.get_stock_quote, ticker)]
+            wait(futures, timeout=Config.PREFERRED_QUOTE_WAIT)
+            if futures[0].done():
+                try:
+                    quote = futures[0].result()
+                    if "error" not in quote:
+                        return quote
+                except Exception:
+                    pass
+            
+            # Yahoo failed or is slow: race the remaining providers against it
+            futures.extend(executor.submit(provider, ticker) for provider in fallbacks)
+            
+            pending = set(futures)
+            while pending:
+                # Check finished providers in priority order
+                for future in futures:
+                    if future in pending and future.done():
+                        pending.discard(future)
+                        try:
+                            quote = future.result()
+                        except Exception:
+                            continue
+                        if "error" not in quote:
+                            return quote
+                
+                if pending:
+                    wait(pending, return_when=FIRST_COMPLETED)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
         return {"error": f"Unable to fetch quote for {ticker} from any source"}
     
+    # (field that must be truthy, template, fallback); field None = static line
+    CONTEXT_QUOTE_LINES = (
+        ('current_price', "  Price: ${current_price:.2f}", "  Price: N/A"),
+        ('change', "  Change: {change} ({percent_change}%)", ""),
+        ('day_low', "  Day Range: ${day_low:.2f} - ${day_high:.2f}", ""),
+        ('volume', "  Volume: {volume:,}", ""),
+        (None, "", ""),
+        (None, "KEY METRICS:", ""),
+        ('market_cap', "  Market Cap: ${market_cap:,.0f}", ""),
+        ('pe_ratio', "  P/E Ratio: {pe_ratio:.2f}", ""),
+        ('52_week_low', "  52-Week Range: ${52_week_low} - ${52_week_high}", ""),
+    )
+    
     def format_for_context(self, ticker: str, include_news: bool = False) -> str:
         """
         Format financial data as text for RAG context
@@ -352,26 +829,26 @@ class FinancialDataFetcher:
         if "error" in quote:
             return f"Unable to retrieve real-time data for {ticker}: {quote['error']}"
         
-        # Format main quote
+        # Format main quote; missing fields render as N/A
+        quote_values = defaultdict(lambda: 'N/A', quote)
+        quote_values.setdefault('source', 'Multiple sources')
+        company_values = defaultdict(lambda: 'N/A', company)
+        
         context_parts = [
             f"=== REAL-TIME DATA FOR {ticker} ===",
-            f"Retrieved: {quote.get('timestamp', 'N/A')}",
-            f"Source: {quote.get('source', 'Multiple sources')}",
+            f"Retrieved: {quote_values['timestamp']}",
+            f"Source: {quote_values['source']}",
             "",
-            f"Company: {company.get('company_name', 'N/A')}",
-            f"Sector: {company.get('sector', 'N/A')} | Industry: {company.get('industry', 'N/A')}",
+            f"Company: {company_values['company_name']}",
+            f"Sector: {company_values['sector']} | Industry: {company_values['industry']}",
             "",
             "CURRENT TRADING DATA:",
-            f"  Price: ${quote.get('current_price', 'N/A'):.2f}" if quote.get('current_price') else "  Price: N/A",
-            f"  Change: {quote.get('change', 'N/A')} ({quote.get('percent_change', 'N/A')}%)" if quote.get('change') else "",
-            f"  Day Range: ${quote.get('day_low', 'N/A'):.2f} - ${quote.get('day_high', 'N/A'):.2f}" if quote.get('day_low') else "",
-            f"  Volume: {quote.get('volume', 'N/A'):,}" if quote.get('volume') else "",
-            "",
-            "KEY METRICS:",
-            f"  Market Cap: ${quote.get('market_cap', 0):,.0f}" if quote.get('market_cap') else "",
-            f"  P/E Ratio: {quote.get('pe_ratio', 'N/A'):.2f}" if quote.get('pe_ratio') else "",
-            f"  52-Week Range: ${quote.get('52_week_low', 'N/A')} - ${quote.get('52_week_high', 'N/A')}" if quote.get('52_week_low') else "",
         ]
+        for field, template, fallback in self.CONTEXT_QUOTE_LINES:
+            if field is None:
+                context_parts.append(template)
+            else:
+                context_parts.append(template.format_map(quote_values) if quote.get(field) else fallback)
         
         # Add company description
         if company.get('description'):
@@ -382,7 +859,7 @@ class FinancialDataFetcher:
             ])
         
         # Add recent news if requested
-        if include_news and Config.FINNHUB_API_KEY:
+        if include_news and Config.finnhub_api_key():
             news = self.get_company_news(ticker, days_back=7)
             if news:
                 context_parts.extend([
@@ -398,27 +875,43 @@ class FinancialDataFetcher:
         """
         Get overview of major market indices (FREE)
         """
-        indices = {
-            "S&P 500": "^GSPC",
-            "Dow Jones": "^DJI",
-            "NASDAQ": "^IXIC",
-            "Russell 2000": "^RUT"
-        }
-        
         overview = {}
-        for name, symbol in indices.items():
-            try:
-                quote = self.get_stock_quote(symbol)
-                if "error" not in quote:
-                    overview[name] = {
-                        "price": quote.get('current_price'),
-                        "change": quote.get('change'),
-                        "change_percent": quote.get('percent_change')
-                    }
-            except:
-                continue
         
-        return overview
+        # One spark request covers every index
+        spark_quotes = self.get_quotes_multi(list(self.MARKET_INDICES.values()))
+        for name, symbol in self.MARKET_INDICES.items():
+            quote = spark_quotes.get(symbol)
+            if quote:
+                overview[name] = {
+                    "price": quote.get('current_price'),
+                    "change": quote.get('change'),
+                    "change_percent": quote.get('percent_change')
+                }
+        
+        # Fall back to per-symbol lookups for anything spark did not return
+        missing = {name: symbol for name, symbol in self.MARKET_INDICES.items() if name not in overview}
+        if not missing:
+            return overview
+        
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            futures = {
+                executor.submit(self.get_stock_quote, symbol): name
+                for name, symbol in missing.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    quote = future.result()
+                    if "error" not in quote:
+                        overview[futures[future]] = {
+                            "price": quote.get('current_price'),
+                            "change": quote.get('change'),
+                            "change_percent": quote.get('percent_change')
+                        }
+                except:
+                    continue
+        
+        # Keep the canonical index order regardless of completion order
+        return {name: overview[name] for name in self.MARKET_INDICES if name in overview}
 
 
 # Example usage and testing
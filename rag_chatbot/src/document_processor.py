@@ -2,27 +2,106 @@
 Document processing for financial reports and filings
 """
 import os
-from typing import List, Dict
+import hashlib
+import functools
+import itertools
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
-import PyPDF2
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+import pypdfium2 as pdfium
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from openai import OpenAI
 from rag_chatbot.src.config import Config
 
 
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+@functools.lru_cache(maxsize=None)
+def get_length_function(mode: str) -> Callable[[str], int]:
+    """
+    Length measure used for chunking
+    
+    Args:
+        mode: "character" for len(), or "tiktoken" for the number of
+              Config.TIKTOKEN_ENCODING tokens
+    
+    Returns:
+        Function mapping text to its length
+    """
+    if mode == "tiktoken":
+        import tiktoken
+        
+        encoding = tiktoken.get_encoding(Config.TIKTOKEN_ENCODING)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    
+    return len
+
+
+@functools.lru_cache(maxsize=None)
+def get_text_splitter(mode: str, chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """
+    Build a text splitter once per process for each distinct configuration
+    
+    Args:
+        mode: Length measure, see get_length_function
+        chunk_size: Maximum chunk length
+        chunk_overlap: Overlap between consecutive chunks
+    
+    Returns:
+        Configured RecursiveCharacterTextSplitter
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=get_length_function(mode),
+        separators=SEPARATORS
+    )
+
+
 class DocumentProcessor:
     """Process financial documents for RAG system"""
      
     def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        
         # Create directories if they don't exist
         os.makedirs(Config.DATA_DIR, exist_ok=True)
         os.makedirs(Config.PROCESSED_DIR, exist_ok=True)
+        
+        # file_path -> chunk cache written/read when it was last processed, so
+        # embed_chunks writes back under the same key even if the file changed
+        self._chunk_caches: Dict[str, Path] = {}
+    
+    @property
+    def text_splitter(self) -> RecursiveCharacterTextSplitter:
+        """Process-wide splitter (not stored on the instance, so it is never pickled)"""
+        return get_text_splitter(Config.TEXT_SPLITTER, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+    
+    def iter_pdf_pages(self, pdf_path: str) -> Iterator[str]:
+        """
+        Lazily extract text from a PDF file, one page at a time
+        
+        Args:
+            pdf_path: Path to PDF file
+        
+        Yields:
+            Text content of each page
+        
+        Raises:
+            Any extraction error, so callers never mistake a partial read for
+            the whole document
+        """
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            for page in pdf:
+                text_page = page.get_textpage()
+                try:
+                    yield text_page.get_text_range()
+                finally:
+                    text_page.close()
+                    page.close()
+        finally:
+            pdf.close()
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """
@@ -35,18 +114,55 @@ class DocumentProcessor:
             Extracted text content
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                return text
+            return "".join(f"{page}\n" for page in self.iter_pdf_pages(pdf_path))
         except Exception as e:
             print(f"Error extracting PDF text: {e}")
             return ""
     
+    def split_pages(self, pages: Iterable[str]) -> List[str]:
+        """
+        Split a stream of pages into chunks without materializing the whole document
+        
+        The last (possibly incomplete) chunk of each split is carried over and
+        re-split together with the following page, so chunk boundaries and
+        overlaps match splitting the concatenated text closely.
+        
+        Args:
+            pages: Iterable of page texts
+        
+        Returns:
+            List of text chunks
+        """
+        splitter = self.text_splitter
+        length = get_length_function(Config.TEXT_SPLITTER)
+        window = Config.CHUNK_SIZE + Config.CHUNK_OVERLAP
+        
+        chunks = []
+        buffer = ""
+        # Running length in the splitter's unit; only new text is measured
+        buffer_length = 0
+        
+        for page in pages:
+            page_text = page + "\n"
+            buffer += page_text
+            buffer_length += length(page_text)
+            if buffer_length <= window:
+                continue
+            
+            page_chunks = splitter.split_text(buffer)
+            if not page_chunks:
+                buffer, buffer_length = "", 0
+                continue
+            
+            chunks.extend(page_chunks[:-1])
+            buffer = page_chunks[-1] + "\n"
+            buffer_length = length(buffer)
+        
+        if buffer.strip():
+            chunks.extend(splitter.split_text(buffer))
+        
+        return chunks
+    
     def read_text_file(self, file_path: str) -> str:
         """
         Read text from .txt file
@@ -64,6 +180,50 @@ class DocumentProcessor:
             print(f"Error reading text file: {e}")
             return ""
     
+    def _chunk_cache_path(self, file_path: str) -> Optional[Path]:
+        """
+        Parquet cache location for a document's chunks
+        
+        The key covers the file path, its modification time and the chunking
+        settings, so edited files or new settings are re-processed.
+        """
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            return None
+        
+        key = f"{file_path}{mtime}{Config.CHUNK_SIZE}{Config.CHUNK_OVERLAP}{Config.TEXT_SPLITTER}"
+        return Path(Config.PROCESSED_DIR) / f"{hashlib.md5(key.encode()).hexdigest()}.parquet"
+    
+    def _load_cached_chunks(self, cache_path: Optional[Path]) -> Optional[List[Dict]]:
+        """Load previously processed chunks, or None if there is no usable cache"""
+        if cache_path is None or not cache_path.exists():
+            return None
+        
+        try:
+            documents = pd.read_parquet(cache_path).to_dict('records')
+        except Exception as e:
+            print(f"Error reading chunk cache {cache_path.name}: {e}")
+            return None
+        
+        # Parquet list columns come back as numpy arrays
+        for doc in documents:
+            embedding = doc.get("embedding")
+            if embedding is not None and hasattr(embedding, 'tolist'):
+                doc["embedding"] = embedding.tolist()
+        
+        return documents
+    
+    def _save_cached_chunks(self, cache_path: Optional[Path], documents: List[Dict]):
+        """Persist processed chunks as zstd-compressed Parquet"""
+        if cache_path is None or not documents:
+            return
+        
+        try:
+            pd.DataFrame(documents).to_parquet(cache_path, compression='zstd', index=False)
+        except Exception as e:
+            print(f"Error writing chunk cache {cache_path.name}: {e}")
+    
     def process_document(self, file_path: str) -> List[Dict]:
         """
         Process a document and split into chunks
@@ -74,23 +234,39 @@ class DocumentProcessor:
         Returns:
             List of dictionaries containing chunks and metadata
         """
-        file_extension = Path(file_path).suffix.lower()
-        filename = Path(file_path).name
+        documents, cache_path = self._process_document(file_path)
+        if documents and cache_path is not None:
+            self._chunk_caches[file_path] = cache_path
+        return documents
+    
+    def _process_document(self, file_path: str) -> Tuple[List[Dict], Optional[Path]]:
+        """process_document, also returning the chunk cache path"""
+        path = Path(file_path)
+        file_extension = path.suffix.lower()
+        filename = path.name
         
-        # Extract text based on file type
+        cache_path = self._chunk_cache_path(file_path)
+        cached_documents = self._load_cached_chunks(cache_path)
+        if cached_documents is not None:
+            return cached_documents, cache_path
+        
+        # Extract text based on file type and split into chunks
         if file_extension == '.pdf':
-            text = self.extract_text_from_pdf(file_path)
+            try:
+                chunks = self.split_pages(self.iter_pdf_pages(file_path))
+            except Exception as e:
+                # Don't keep (or cache) the pages read before the failure
+                print(f"Error extracting PDF text: {e}")
+                return [], None
         elif file_extension == '.txt':
             text = self.read_text_file(file_path)
+            chunks = self.text_splitter.split_text(text) if text else []
         else:
             print(f"Unsupported file type: {file_extension}")
-            return []
-        
-        if not text:
-            return []
+            return [], None
         
-        # Split into chunks
-        chunks = self.text_splitter.split_text(text)
+        if not chunks:
+            return [], None
         
         # Create documents with metadata
         documents = []
@@ -105,14 +281,72 @@ class DocumentProcessor:
                 }
             })
         
+        self._save_cached_chunks(cache_path, documents)
+        
+        return documents, cache_path
+    
+    def embed_chunks(self, documents: List[Dict], batch_size: int = 256, max_workers: int = 8) -> List[Dict]:
+        """
+        Attach embeddings to chunks using batched OpenAI requests
+        
+        Chunks that already carry an embedding (e.g. loaded from the Parquet
+        cache) are skipped; newly embedded chunks are written back to the cache
+        for files this processor produced whose chunks were all passed in.
+        
+        Args:
+            documents: Processed chunks from process_document/process_directory
+            batch_size: Number of chunks per embeddings request
+            max_workers: Number of concurrent embeddings requests
+        
+        Returns:
+            The same documents, each with an "embedding" vector when successful
+        """
+        pending = [doc for doc in documents if doc.get("embedding") is None]
+        if not pending:
+            return documents
+        
+        client = OpenAI(api_key=Config.openai_api_key())
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        
+        def embed_batch(batch: List[Dict]):
+            try:
+                response = client.embeddings.create(
+                    model=Config.EMBEDDING_MODEL,
+                    input=[doc["content"] for doc in batch]
+                )
+                for item in response.data:
+                    batch[item.index]["embedding"] = item.embedding
+            except Exception as e:
+                print(f"Error embedding batch of {len(batch)} chunks: {e}")
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            list(executor.map(embed_batch, batches))
+        
+        # Re-save files that gained embeddings so re-ingests skip the API. Only
+        # complete files are written (a filtered subset would truncate the cache),
+        # and always to the path recorded at processing time.
+        updated_files = {doc["metadata"]["file_path"] for doc in pending}
+        by_file = {}
+        for doc in documents:
+            file_path = doc["metadata"]["file_path"]
+            if file_path in updated_files:
+                by_file.setdefault(file_path, []).append(doc)
+        
+        for file_path, file_documents in by_file.items():
+            cache_path = self._chunk_caches.get(file_path)
+            chunk_ids = {doc["metadata"]["chunk_id"] for doc in file_documents}
+            if cache_path is not None and len(file_documents) == len(chunk_ids) == file_documents[0]["metadata"]["total_chunks"]:
+                self._save_cached_chunks(cache_path, file_documents)
+        
         return documents
     
-    def process_directory(self, directory: str = None) -> List[Dict]:
+    def process_directory(self, directory: str = None, max_workers: int = None) -> List[Dict]:
         """
-        Process all documents in a directory
+        Process all documents in a directory, parsing files in parallel processes
         
         Args:
             directory: Directory path (defaults to Config.DATA_DIR)
+            max_workers: Number of worker processes (defaults to os.cpu_count())
         
         Returns:
             List of all processed document chunks
@@ -120,13 +354,27 @@ class DocumentProcessor:
         if directory is None:
             directory = Config.DATA_DIR
         
+        # Only walk matching entries; character classes keep the match case-insensitive
+        root = Path(directory)
+        paths = [
+            p for p in itertools.chain(root.rglob('*.[pP][dD][fF]'), root.rglob('*.[tT][xX][tT]'))
+            if p.is_file()
+        ]
+        for file_path in paths:
+            print(f"Processing: {file_path.name}")
+        
         all_documents = []
         
-        for file_path in Path(directory).glob('**/*'):
-            if file_path.is_file() and file_path.suffix.lower() in ['.pdf', '.txt']:
-                print(f"Processing: {file_path.name}")
-                docs = self.process_document(str(file_path))
-                all_documents.extend(docs)
+        if len(paths) == 1:
+            all_documents.extend(self.process_document(str(paths[0])))
+        elif paths:
+            file_paths = [str(p) for p in paths]
+            with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+                results = executor.map(self._process_document, file_paths, chunksize=4)
+                for file_path, (docs, cache_path) in zip(file_paths, results):
+                    if docs and cache_path is not None:
+                        self._chunk_caches[file_path] = cache_path
+                    all_documents.extend(docs)
         
         print(f"Processed {len(all_documents)} chunks from {directory}")
         return all_documents
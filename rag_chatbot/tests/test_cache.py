@@ -0,0 +1,167 @@
+"""
+Tests for the disk cache and the @cached fetcher decorator
+"""
+import os
+import threading
+import time
+
+from rag_chatbot.src.cache import FileCache, cached
+
+
+def _age(path, seconds):
+    """Push a file's mtime (the LRU timestamp) into the past"""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_get_returns_value_set(tmp_path):
+    cache = FileCache(tmp_path)
+    cache.set("quotes", "aapl", {"price": 1.5}, ttl=60)
+
+    assert cache.get("quotes", "aapl") == {"price": 1.5}
+    assert cache.get("quotes", "msft") is None
+
+
+def test_unserializable_values_are_pickled(tmp_path):
+    cache = FileCache(tmp_path)
+    cache.set("quotes", "aapl", {1, 2}, ttl=60)
+
+    assert cache.get("quotes", "aapl") == {1, 2}
+    assert (tmp_path / "quotes" / "aapl.pkl").exists()
+    assert not (tmp_path / "quotes" / "aapl.json").exists()
+
+
+def test_expired_entries_are_only_served_as_stale(tmp_path, monkeypatch):
+    cache = FileCache(tmp_path, max_stale=100)
+    cache.set("quotes", "aapl", {"price": 1.5}, ttl=10)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    assert cache.get("quotes", "aapl") is None
+    assert cache.get("quotes", "aapl", allow_stale=True) == {"price": 1.5}
+
+    monkeypatch.setattr(time, "time", lambda: now + 200)
+    assert cache.get("quotes", "aapl", allow_stale=True) is None
+
+
+def test_concurrent_writers_leave_a_readable_entry(tmp_path):
+    cache = FileCache(tmp_path)
+
+    def write(i):
+        cache.set("quotes", "aapl", {"writer": i}, ttl=60)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.get("quotes", "aapl") is not None
+    assert not list((tmp_path / "quotes").glob("*.tmp"))
+
+
+def test_incr_is_atomic_across_threads(tmp_path):
+    cache = FileCache(tmp_path)
+
+    def bump():
+        for _ in range(10):
+            cache.incr("rate_limit", "fmp", ttl=60)
+
+    threads = [threading.Thread(target=bump) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.get("rate_limit", "fmp") == 200
+    assert cache.incr("rate_limit", "fmp", ttl=60) == 201
+
+
+def test_incr_restarts_expired_counters(tmp_path, monkeypatch):
+    cache = FileCache(tmp_path)
+    cache.incr("rate_limit", "fmp", ttl=10)
+    cache.incr("rate_limit", "fmp", ttl=10)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 20)
+    assert cache.incr("rate_limit", "fmp", ttl=10) == 1
+
+
+def test_prune_drops_entries_past_max_stale(tmp_path, monkeypatch):
+    cache = FileCache(tmp_path, max_stale=100)
+    cache.set("quotes", "old", 1, ttl=10)
+    cache.set("quotes", "new", 2, ttl=1000)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 500)
+    cache.prune("quotes")
+
+    assert sorted(p.name for p in (tmp_path / "quotes").iterdir()) == ["new.json"]
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = FileCache(tmp_path, max_entries=2)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.set("quotes", key, i, ttl=60)
+        _age(tmp_path / "quotes" / f"{key}.json", 300 - i * 100)
+
+    # A hit refreshes "a", so "b" becomes the oldest
+    assert cache.get("quotes", "a") == 0
+    cache.prune("quotes")
+
+    assert sorted(p.name for p in (tmp_path / "quotes").iterdir()) == ["a.json", "c.json"]
+
+
+def test_prune_removes_old_counter_locks(tmp_path, monkeypatch):
+    cache = FileCache(tmp_path, max_stale=100)
+    cache.incr("rate_limit", "fmp_yesterday", ttl=10)
+    _age(tmp_path / "rate_limit" / "fmp_yesterday.lock", 1000)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 500)
+    cache.incr("rate_limit", "fmp_today", ttl=1000)
+    cache.prune("rate_limit")
+
+    assert sorted(p.name for p in (tmp_path / "rate_limit").iterdir()) == ["fmp_today.json", "fmp_today.lock"]
+
+
+class _Fetcher:
+    """Minimal object shaped like FinancialDataFetcher for the decorator"""
+
+    def __init__(self, cache, results):
+        self.cache = cache
+        self.cache_fallback = True
+        self.results = results
+        self.calls = 0
+
+    @cached(endpoint="quotes", ttl=60)
+    def get_quote(self, ticker):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def test_cached_stores_successful_results(tmp_path):
+    fetcher = _Fetcher(FileCache(tmp_path), [{"price": 1.5}])
+
+    assert fetcher.get_quote("AAPL") == {"price": 1.5}
+    assert fetcher.get_quote("AAPL") == {"price": 1.5}
+    assert fetcher.calls == 1
+
+
+def test_cached_never_stores_errors(tmp_path):
+    fetcher = _Fetcher(FileCache(tmp_path), [{"error": "down"}, {}, {"price": 1.5}])
+
+    assert fetcher.get_quote("AAPL") == {"error": "down"}
+    assert fetcher.get_quote("AAPL") == {}
+    assert fetcher.get_quote("AAPL") == {"price": 1.5}
+    assert fetcher.calls == 3
+
+
+def test_cached_falls_back_to_stale_entry_on_error(tmp_path, monkeypatch):
+    fetcher = _Fetcher(FileCache(tmp_path), [{"price": 1.5}, {"error": "down"}])
+    fetcher.get_quote("AAPL")
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert fetcher.get_quote("AAPL") == {"price": 1.5}
+    assert fetcher.calls == 2
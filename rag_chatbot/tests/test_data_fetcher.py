@@ -0,0 +1,125 @@
+"""
+Tests for provider priority in get_comprehensive_quote (sync and async)
+"""
+import time
+
+import pytest
+
+from rag_chatbot.src.async_data_fetcher import AsyncFinancialDataFetcher
+from rag_chatbot.src.cache import FileCache
+from rag_chatbot.src.config import Config
+from rag_chatbot.src.data_fetcher import FinancialDataFetcher
+
+
+@pytest.fixture(autouse=True)
+def keys(monkeypatch):
+    monkeypatch.setattr(Config, "finnhub_api_key", staticmethod(lambda: "finnhub-key"))
+    monkeypatch.setattr(Config, "fmp_api_key", staticmethod(lambda: "fmp-key"))
+    monkeypatch.setattr(Config, "PREFERRED_QUOTE_WAIT", 0.2)
+
+
+def _provider(source, calls, delay=0.0, error=False):
+    def fetch(ticker):
+        calls.append(source)
+        time.sleep(delay)
+        if error:
+            return {"error": f"{source} failed"}
+        return {"ticker": ticker, "source": source}
+    return fetch
+
+
+def _async_provider(source, calls, error=False):
+    async def fetch(ticker):
+        calls.append(source)
+        if error:
+            return {"error": f"{source} failed"}
+        return {"ticker": ticker, "source": source}
+    return fetch
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return FinancialDataFetcher(cache=FileCache(tmp_path))
+
+
+def _install(fetcher, calls, yahoo_delay=0.0, yahoo_error=False, finnhub_error=False, fmp_delay=0.0):
+    fetcher.get_stock_quote = _provider("Yahoo Finance", calls, yahoo_delay, yahoo_error)
+    fetcher.get_finnhub_quote = _provider("Finnhub", calls, error=finnhub_error)
+    fetcher.get_fmp_quote = _provider("FMP", calls, fmp_delay)
+
+
+def test_fast_yahoo_skips_keyed_providers(fetcher):
+    calls = []
+    _install(fetcher, calls)
+
+    assert fetcher.get_comprehensive_quote("AAPL")["source"] == "Yahoo Finance"
+    assert calls == ["Yahoo Finance"]
+
+
+def test_yahoo_error_falls_back_to_first_successful_provider(fetcher):
+    calls = []
+    _install(fetcher, calls, yahoo_error=True, fmp_delay=0.3)
+    assert fetcher.get_comprehensive_quote("AAPL")["source"] == "Finnhub"
+
+    calls = []
+    _install(fetcher, calls, yahoo_error=True, finnhub_error=True)
+    assert fetcher.get_comprehensive_quote("AAPL")["source"] == "FMP"
+
+
+def test_slow_yahoo_loses_after_the_preferred_wait(fetcher):
+    calls = []
+    _install(fetcher, calls, yahoo_delay=2, fmp_delay=0.3)
+
+    started = time.monotonic()
+    quote = fetcher.get_comprehensive_quote("AAPL")
+
+    assert quote["source"] == "Finnhub"
+    assert time.monotonic() - started < 1
+
+
+def test_all_providers_failing_returns_error(fetcher):
+    calls = []
+    _install(fetcher, calls, yahoo_error=True, finnhub_error=True)
+    fetcher.get_fmp_quote = _provider("FMP", calls, error=True)
+
+    assert "error" in fetcher.get_comprehensive_quote("AAPL")
+    assert sorted(calls) == ["FMP", "Finnhub", "Yahoo Finance"]
+
+
+@pytest.fixture
+def async_fetcher(fetcher):
+    async_fetcher = AsyncFinancialDataFetcher()
+    async_fetcher.sync_fetcher = fetcher
+    return async_fetcher
+
+
+def test_async_fast_yahoo_skips_keyed_providers(async_fetcher):
+    calls = []
+    async_fetcher.sync_fetcher.get_stock_quote = _provider("Yahoo Finance", calls)
+    async_fetcher.get_finnhub_quote = _async_provider("Finnhub", calls)
+    async_fetcher.get_fmp_quote = _async_provider("FMP", calls)
+
+    assert async_fetcher.get_comprehensive_quote_sync("AAPL")["source"] == "Yahoo Finance"
+    assert calls == ["Yahoo Finance"]
+
+
+def test_async_ties_go_to_the_higher_priority_provider(async_fetcher):
+    calls = []
+    async_fetcher.sync_fetcher.get_stock_quote = _provider("Yahoo Finance", calls, error=True)
+    async_fetcher.get_finnhub_quote = _async_provider("Finnhub", calls)
+    async_fetcher.get_fmp_quote = _async_provider("FMP", calls)
+
+    assert async_fetcher.get_comprehensive_quote_sync("AAPL")["source"] == "Finnhub"
+
+
+def test_async_sync_wrapper_does_not_wait_for_slow_yahoo(async_fetcher):
+    calls = []
+    async_fetcher.sync_fetcher.get_stock_quote = _provider("Yahoo Finance", calls, delay=2)
+    async_fetcher.get_finnhub_quote = _async_provider("Finnhub", calls, error=True)
+    async_fetcher.get_fmp_quote = _async_provider("FMP", calls)
+
+    started = time.monotonic()
+    quote = async_fetcher.get_comprehensive_quote_sync("AAPL")
+
+    assert quote["source"] == "FMP"
+    assert time.monotonic() - started < 1
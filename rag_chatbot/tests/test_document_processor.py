@@ -0,0 +1,52 @@
+"""
+Tests for streaming page splitting
+"""
+import pytest
+
+from rag_chatbot.src.config import Config
+from rag_chatbot.src.document_processor import DocumentProcessor
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "CHUNK_SIZE", 200)
+    monkeypatch.setattr(Config, "CHUNK_OVERLAP", 40)
+    monkeypatch.setattr(Config, "TEXT_SPLITTER", "character")
+    return DocumentProcessor()
+
+
+def _pages(count, words_per_page):
+    return [
+        " ".join(f"p{page}w{word}" for word in range(words_per_page))
+        for page in range(count)
+    ]
+
+
+def _ordered_words(chunks):
+    """Words of the chunks in order, dropping repeats introduced by overlap"""
+    words = []
+    for chunk in chunks:
+        for word in chunk.split():
+            if word not in words[-50:]:
+                words.append(word)
+    return words
+
+
+@pytest.mark.parametrize("count, words_per_page", [(1, 5), (3, 100), (20, 7), (5, 0)])
+def test_split_pages_covers_every_word_in_order(processor, count, words_per_page):
+    pages = _pages(count, words_per_page)
+
+    chunks = processor.split_pages(iter(pages))
+
+    assert _ordered_words(chunks) == " ".join(pages).split()
+    assert all(len(chunk) <= Config.CHUNK_SIZE for chunk in chunks)
+
+
+def test_split_pages_matches_splitting_the_whole_text(processor):
+    pages = _pages(10, 60)
+
+    chunks = processor.split_pages(iter(pages))
+    expected = processor.text_splitter.split_text("\n".join(pages))
+
+    assert _ordered_words(chunks) == _ordered_words(expected)